@@ -1,23 +1,220 @@
 from shiny import App, render, ui, reactive
 import numpy as np
-import matplotlib.pyplot as plt
-import pandas as pd
-from scipy.optimize import fsolve
 import math
 
+# matplotlib and pandas are imported inside the functions that use them,
+# so the app starts serving before those heavy imports are paid for
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional (it is not available in the Shiny playground),
+    # so fall back to running the decorated functions as plain Python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
 # Acetone-Ethanol VLE data (approximate)
+_ALPHA = 2.4  # Relative volatility of acetone to ethanol
+_ALPHA_M1 = _ALPHA - 1.0
+
 def equilibrium_curve(x):
     """
     Acetone-Ethanol equilibrium relationship
     Based on relative volatility approximation
     """
-    alpha = 2.4  # Relative volatility of acetone to ethanol
-    return (alpha * x) / (1 + (alpha - 1) * x)
+    return (_ALPHA * x) / (1.0 + _ALPHA_M1 * x)
 
 def x_from_y_equilibrium(y):
     """Inverse equilibrium relationship"""
-    alpha = 2.4
-    return y / (alpha - y * (alpha - 1))
+    return y / (_ALPHA - y * _ALPHA_M1)
+
+# Plotting grid for the equilibrium curve; this never changes between renders
+x_eq = np.linspace(0, 1, 100)
+y_eq = equilibrium_curve(x_eq)
+
+@njit(cache=True)
+def calculate_stages(x_d, x_b, x_feed_intersect, y_feed_intersect, 
+                     slope_rect, intercept_rect, slope_strip, intercept_strip):
+    """
+    Calculate number of stages using McCabe-Thiele graphical method
+    
+    Returns (stages_rect, stages_strip, feed_stage, x_liquid, y_vapor,
+    x_next, y_next, stage_count); only the first stage_count entries of
+    the per-stage arrays are filled.
+    """
+    # Per-stage results, one preallocated column per quantity
+    max_stages = 50
+    x_liq = np.empty(max_stages)
+    y_vap = np.empty(max_stages)
+    x_next = np.empty(max_stages)
+    y_next = np.empty(max_stages)
+    
+    # Start from distillate composition
+    x_current = x_d
+    y_current = x_d  # At total condenser
+    stage_num = 0
+    stages_rect = 0
+    stages_strip = 0
+    feed_stage = -1
+    
+    # Rectifying section
+    while x_current > x_feed_intersect and stage_num < max_stages:
+        stage_num += 1
+        stages_rect += 1
+        
+        # Step down to equilibrium curve (x_from_y_equilibrium, inlined)
+        x_new = y_current / (_ALPHA - y_current * _ALPHA_M1)
+        
+        # Step across to operating line
+        if x_new >= x_feed_intersect:
+            y_new = slope_rect * x_new + intercept_rect
+        else:
+            # Switch to stripping section
+            y_new = slope_strip * x_new + intercept_strip
+            feed_stage = stage_num
+            stages_rect -= 1
+            stages_strip += 1
+        
+        x_liq[stage_num - 1] = x_new
+        y_vap[stage_num - 1] = y_current
+        x_next[stage_num - 1] = x_current
+        y_next[stage_num - 1] = y_new
+        
+        x_current = x_new
+        y_current = y_new
+        
+        if x_current <= x_b * 1.01:  # Close to bottoms composition
+            break
+    
+    # Continue with stripping section if not already switched
+    if feed_stage == -1:
+        feed_stage = stages_rect
+    
+    while x_current > x_b * 1.01 and stage_num < max_stages:
+        stage_num += 1
+        stages_strip += 1
+        
+        # Step down to equilibrium curve
+        x_new = y_current / (_ALPHA - y_current * _ALPHA_M1)
+        
+        # Step across to stripping operating line
+        y_new = slope_strip * x_new + intercept_strip
+        
+        x_liq[stage_num - 1] = x_new
+        y_vap[stage_num - 1] = y_current
+        x_next[stage_num - 1] = x_current
+        y_next[stage_num - 1] = y_new
+        
+        x_current = x_new
+        y_current = y_new
+        
+        if x_current <= x_b * 1.01:
+            break
+    
+    return (stages_rect, stages_strip, feed_stage,
+            x_liq, y_vap, x_next, y_next, stage_num)
+
+@njit(cache=True)
+def _compute_design(x_f, x_d, x_b, q, R_factor):
+    """
+    McCabe-Thiele design for the given compositions, q-factor and R/Rmin.
+    Pure numeric kernel with no Shiny dependencies, so it can be compiled
+    and called repeatedly, e.g. for design sensitivity scans.
+    
+    Returns (R_min, R, slope_rect, intercept_rect, slope_strip,
+    intercept_strip, x_intersect, y_intersect, x_feed_intersect,
+    y_feed_intersect, stages_rect, stages_strip, feed_stage, x_liquid,
+    y_vapor, x_next, y_next, stage_count), with the per-stage arrays as
+    returned by calculate_stages.
+    """
+    # Find minimum reflux ratio
+    # At minimum reflux, operating lines intersect at feed line intersection with equilibrium curve
+    
+    # Feed line: y = q/(q-1) * x - x_f/(q-1)
+    # For subcooled liquid, q > 1
+    
+    # Find intersection of feed line with equilibrium curve
+    # Substituting y = alpha*x / (1 + (alpha-1)*x) into the feed line
+    # (multiplied through by (q-1)) gives a*x^2 + b*x + c = 0
+    a = q * _ALPHA_M1
+    b = q - x_f * _ALPHA_M1 - _ALPHA * (q - 1)
+    c = -x_f
+    x_intersect = x_f
+    if a == 0:
+        x_intersect = -c / b
+    else:
+        discriminant = b**2 - 4 * a * c
+        if discriminant >= 0:
+            root_plus = (-b + math.sqrt(discriminant)) / (2 * a)
+            root_minus = (-b - math.sqrt(discriminant)) / (2 * a)
+            if 0 <= root_plus <= 1:
+                x_intersect = root_plus
+            elif 0 <= root_minus <= 1:
+                x_intersect = root_minus
+    
+    # equilibrium_curve, inlined
+    y_intersect = (_ALPHA * x_intersect) / (1.0 + _ALPHA_M1 * x_intersect)
+    
+    # Minimum reflux ratio
+    R_min = (x_d - y_intersect) / (y_intersect - x_intersect)
+    if R_min < 0:
+        R_min = 0.5
+    
+    # Actual reflux ratio
+    R = R_factor * R_min
+    
+    # Operating line slopes and intercepts
+    # Rectifying section: y = (R/(R+1)) * x + x_d/(R+1)
+    slope_rect = R / (R + 1)
+    intercept_rect = x_d / (R + 1)
+    
+    # Stripping section operating line intersects rectifying line at feed stage
+    # Find intersection of rectifying line with feed line
+    # Rectifying: y = slope_rect * x + intercept_rect
+    # Feed: y = q/(q-1) * x - x_f/(q-1)
+    
+    # Multiplying both lines through by (q-1) keeps this valid for q = 1
+    denominator = q - slope_rect * (q - 1)
+    if denominator != 0:
+        x_feed_intersect = (intercept_rect * (q - 1) + x_f) / denominator
+    else:
+        x_feed_intersect = x_f
+    y_feed_intersect = slope_rect * x_feed_intersect + intercept_rect
+    
+    # Stripping section: passes through (x_b, x_b) and (x_feed_intersect, y_feed_intersect)
+    if x_feed_intersect != x_b:
+        slope_strip = (y_feed_intersect - x_b) / (x_feed_intersect - x_b)
+    else:
+        slope_strip = 1.0
+    intercept_strip = x_b - slope_strip * x_b
+    
+    # Calculate stages
+    (stages_rect, stages_strip, optimal_feed,
+     x_liq, y_vap, x_next, y_next, stage_count) = calculate_stages(
+        x_d, x_b, x_feed_intersect, y_feed_intersect, 
+        slope_rect, intercept_rect, slope_strip, intercept_strip
+    )
+    
+    return (R_min, R, slope_rect, intercept_rect, slope_strip, intercept_strip,
+            x_intersect, y_intersect, x_feed_intersect, y_feed_intersect,
+            stages_rect, stages_strip, optimal_feed,
+            x_liq, y_vap, x_next, y_next, stage_count)
+
+def _compute_flows(F, x_f, x_d, x_b, R):
+    """Distillate, bottoms and rectifying vapor/liquid rates as (D, B, V, L)"""
+    # Overall material balance
+    # F = D + B
+    # F * x_f = D * x_d + B * x_b
+    D = F * (x_f - x_b) / (x_d - x_b)
+    B = F - D
+    
+    # Flow rates
+    V = D * (R + 1)  # Vapor rate in rectifying section
+    L = R * D  # Liquid rate in rectifying section
+    
+    return D, B, V, L
 
 app_ui = ui.page_fluid(
     ui.h2("McCabe-Thiele Distillation Design Tool"),
@@ -73,92 +270,65 @@ app_ui = ui.page_fluid(
 
 def server(input, output, session):
     
+    # One Figure per plot output for this session, cleared and redrawn on
+    # every render instead of being reallocated
+    figures = {}
+    
+    def reusable_axes(name, figsize):
+        from matplotlib.figure import Figure
+        
+        if name not in figures:
+            fig = Figure(figsize=figsize)
+            ax = fig.subplots()
+            params = fig.subplotpars
+            initial_layout = {key: getattr(params, key) for key in
+                              ('left', 'right', 'bottom', 'top', 'wspace', 'hspace')}
+            figures[name] = (fig, ax, fig.dpi, initial_layout)
+        fig, ax, dpi, initial_layout = figures[name]
+        ax.clear()
+        # Shiny resizes the figure when rendering, and tight_layout is not
+        # idempotent once artists sit outside the axes, so always start from
+        # the same size and layout as a fresh figure
+        fig.set_size_inches(figsize)
+        fig.set_dpi(dpi)
+        fig.subplots_adjust(**initial_layout)
+        return fig, ax
+    
     @reactive.calc
-    def calculate_design():
-        # Input parameters
-        F = input.feed_rate()
-        x_f = input.x_feed()
-        x_d = input.x_distillate()
-        x_b = input.x_bottoms()
-        q = input.q_factor()
-        R_factor = input.reflux_ratio_factor()
-        
-        # Overall material balance
-        # F = D + B
-        # F * x_f = D * x_d + B * x_b
-        D = F * (x_f - x_b) / (x_d - x_b)
-        B = F - D
-        
-        # Find minimum reflux ratio
-        # At minimum reflux, operating lines intersect at feed line intersection with equilibrium curve
-        
-        # Feed line: y = q/(q-1) * x - x_f/(q-1)
-        # For subcooled liquid, q > 1
-        
-        # Find intersection of feed line with equilibrium curve
-        def feed_eq_intersection(x):
-            y_feed = q/(q-1) * x - x_f/(q-1)
-            y_eq = equilibrium_curve(x)
-            return y_feed - y_eq
-        
-        try:
-            x_intersect = fsolve(feed_eq_intersection, x_f)[0]
-            y_intersect = equilibrium_curve(x_intersect)
-        except:
-            x_intersect = x_f
-            y_intersect = equilibrium_curve(x_f)
-        
-        # Minimum reflux ratio
-        R_min = (x_d - y_intersect) / (y_intersect - x_intersect)
-        if R_min < 0:
-            R_min = 0.5
-        
-        # Actual reflux ratio
-        R = R_factor * R_min
-        
-        # Operating line slopes and intercepts
-        # Rectifying section: y = (R/(R+1)) * x + x_d/(R+1)
-        slope_rect = R / (R + 1)
-        intercept_rect = x_d / (R + 1)
-        
-        # Stripping section operating line intersects rectifying line at feed stage
-        # Find intersection of rectifying line with feed line
-        # Rectifying: y = slope_rect * x + intercept_rect
-        # Feed: y = q/(q-1) * x - x_f/(q-1)
-        
-        def find_feed_intersection(x):
-            y_rect = slope_rect * x + intercept_rect
-            y_feed = q/(q-1) * x - x_f/(q-1)
-            return y_rect - y_feed
-        
-        try:
-            x_feed_intersect = fsolve(find_feed_intersection, x_f)[0]
-            y_feed_intersect = slope_rect * x_feed_intersect + intercept_rect
-        except:
-            x_feed_intersect = x_f
-            y_feed_intersect = slope_rect * x_f + intercept_rect
-        
-        # Stripping section: passes through (x_b, x_b) and (x_feed_intersect, y_feed_intersect)
-        if x_feed_intersect != x_b:
-            slope_strip = (y_feed_intersect - x_b) / (x_feed_intersect - x_b)
-        else:
-            slope_strip = 1.0
-        intercept_strip = x_b - slope_strip * x_b
-        
-        # Calculate stages
-        stages_rect, stages_strip, optimal_feed, stage_data = calculate_stages(
-            x_d, x_b, x_feed_intersect, y_feed_intersect, 
-            slope_rect, intercept_rect, slope_strip, intercept_strip
+    def calculate_geometry():
+        """
+        Reflux ratio, operating lines and stages. These depend only on the
+        compositions, q and R/Rmin, so changing the feed rate does not
+        invalidate them.
+        """
+        # Input parameters (as floats so the compiled kernel sees one signature)
+        x_f = float(input.x_feed())
+        x_d = float(input.x_distillate())
+        x_b = float(input.x_bottoms())
+        q = float(input.q_factor())
+        R_factor = float(input.reflux_ratio_factor())
+        
+        (R_min, R, slope_rect, intercept_rect, slope_strip, intercept_strip,
+         x_intersect, y_intersect, x_feed_intersect, y_feed_intersect,
+         stages_rect, stages_strip, optimal_feed,
+         x_liq, y_vap, x_next, y_next, stage_count) = _compute_design(
+            x_f, x_d, x_b, q, R_factor
         )
         
-        total_stages = stages_rect + stages_strip
+        # Stages up to stages_rect are above the feed, the rest below it
+        stage_numbers = np.arange(1, stage_count + 1)
+        stage_data = {
+            'Stage': stage_numbers,
+            'Section': np.where(stage_numbers <= stages_rect, "Rectifying", "Stripping"),
+            'x_liquid': x_liq[:stage_count],
+            'y_vapor': y_vap[:stage_count],
+            'x_next': x_next[:stage_count],
+            'y_next': y_next[:stage_count]
+        }
         
-        # Flow rates
-        V = D * (R + 1)  # Vapor rate in rectifying section
-        L = R * D  # Liquid rate in rectifying section
+        total_stages = stages_rect + stages_strip
         
         return {
-            'F': F, 'D': D, 'B': B,
             'x_f': x_f, 'x_d': x_d, 'x_b': x_b,
             'q': q, 'R': R, 'R_min': R_min, 'R_factor': R_factor,
             'slope_rect': slope_rect, 'intercept_rect': intercept_rect,
@@ -167,122 +337,68 @@ def server(input, output, session):
             'x_intersect': x_intersect, 'y_intersect': y_intersect,
             'stages_rect': stages_rect, 'stages_strip': stages_strip,
             'total_stages': total_stages, 'optimal_feed': optimal_feed,
-            'V': V, 'L': L, 'stage_data': stage_data
+            'stage_data': stage_data
         }
     
-    def calculate_stages(x_d, x_b, x_feed_intersect, y_feed_intersect, 
-                        slope_rect, intercept_rect, slope_strip, intercept_strip):
+    @reactive.calc
+    def calculate_design():
+        geometry = calculate_geometry()
+        F = float(input.feed_rate())
+        D, B, V, L = _compute_flows(F, geometry['x_f'], geometry['x_d'],
+                                    geometry['x_b'], geometry['R'])
+        
+        return {**geometry, 'F': F, 'D': D, 'B': B, 'V': V, 'L': L}
+    
+    @reactive.calc
+    def operating_lines():
         """
-        Calculate number of stages using McCabe-Thiele graphical method
+        Endpoints (x, y) of the rectifying, stripping and feed line segments.
+        The lines are straight, so two points each are enough to draw them.
         """
-        stages_data = []
+        design = calculate_geometry()
         
-        # Start from distillate composition
-        x_current = x_d
-        y_current = x_d  # At total condenser
-        stage_num = 0
-        stages_rect = 0
-        stages_strip = 0
-        feed_stage = None
+        # Rectifying section runs from the feed stage up to the distillate
+        x_rect = np.array([design['x_feed_intersect'], design['x_d']])
+        rect = (x_rect, design['slope_rect'] * x_rect + design['intercept_rect'])
         
-        # Rectifying section
-        while x_current > x_feed_intersect and stage_num < 50:
-            stage_num += 1
-            stages_rect += 1
-            
-            # Step down to equilibrium curve
-            x_new = x_from_y_equilibrium(y_current)
-            
-            # Step across to operating line
-            if x_new >= x_feed_intersect:
-                y_new = slope_rect * x_new + intercept_rect
-                section = "Rectifying"
-            else:
-                # Switch to stripping section
-                y_new = slope_strip * x_new + intercept_strip
-                section = "Stripping"
-                feed_stage = stage_num
-                stages_rect -= 1
-                stages_strip += 1
-            
-            stages_data.append({
-                'Stage': stage_num,
-                'Section': section,
-                'x_liquid': x_new,
-                'y_vapor': y_current,
-                'x_next': x_current,
-                'y_next': y_new
-            })
-            
-            x_current = x_new
-            y_current = y_new
-            
-            if x_current <= x_b * 1.01:  # Close to bottoms composition
-                break
-        
-        # Continue with stripping section if not already switched
-        if feed_stage is None:
-            feed_stage = stages_rect
-        
-        while x_current > x_b * 1.01 and stage_num < 50:
-            stage_num += 1
-            stages_strip += 1
-            
-            # Step down to equilibrium curve
-            x_new = x_from_y_equilibrium(y_current)
-            
-            # Step across to stripping operating line
-            y_new = slope_strip * x_new + intercept_strip
-            
-            stages_data.append({
-                'Stage': stage_num,
-                'Section': "Stripping",
-                'x_liquid': x_new,
-                'y_vapor': y_current,
-                'x_next': x_current,
-                'y_next': y_new
-            })
-            
-            x_current = x_new
-            y_current = y_new
-            
-            if x_current <= x_b * 1.01:
-                break
-        
-        return stages_rect, stages_strip, feed_stage, stages_data
+        # Stripping section runs from the bottoms up to the feed stage
+        x_strip = np.array([design['x_b'], design['x_feed_intersect']])
+        strip = (x_strip, design['slope_strip'] * x_strip + design['intercept_strip'])
+        
+        if design['q'] != 1:
+            x_feed = np.array([min(design['x_b'], design['x_feed_intersect']),
+                               max(design['x_d'], design['x_feed_intersect'])])
+            feed = (x_feed, design['q']/(design['q']-1) * x_feed - design['x_f']/(design['q']-1))
+        else:
+            feed = None
+        
+        return rect, strip, feed
     
     @render.plot
     def mccabe_thiele_plot():
-        design = calculate_design()
+        from matplotlib.collections import LineCollection
+        
+        design = calculate_geometry()
+        rect, strip, feed = operating_lines()
         
-        fig, ax = plt.subplots(figsize=(10, 8))
+        fig, ax = reusable_axes('mccabe_thiele_plot', figsize=(10, 8))
         
         # Equilibrium curve
-        x_eq = np.linspace(0, 1, 100)
-        y_eq = [equilibrium_curve(x) for x in x_eq]
         ax.plot(x_eq, y_eq, 'b-', linewidth=2, label='Equilibrium Curve')
         
         # 45-degree line
         ax.plot([0, 1], [0, 1], 'k--', alpha=0.5, label='y = x')
         
         # Operating lines
-        x_op = np.linspace(0, 1, 100)
-        
         # Rectifying section
-        y_rect = design['slope_rect'] * x_op + design['intercept_rect']
-        mask_rect = (x_op >= design['x_feed_intersect']) & (x_op <= design['x_d'])
-        ax.plot(x_op[mask_rect], y_rect[mask_rect], 'r-', linewidth=2, label='Rectifying Operating Line')
+        ax.plot(*rect, 'r-', linewidth=2, label='Rectifying Operating Line')
         
         # Stripping section
-        y_strip = design['slope_strip'] * x_op + design['intercept_strip']
-        mask_strip = (x_op >= design['x_b']) & (x_op <= design['x_feed_intersect'])
-        ax.plot(x_op[mask_strip], y_strip[mask_strip], 'g-', linewidth=2, label='Stripping Operating Line')
+        ax.plot(*strip, 'g-', linewidth=2, label='Stripping Operating Line')
         
         # Feed line
-        if design['q'] != 1:
-            y_feed = design['q']/(design['q']-1) * x_op - design['x_f']/(design['q']-1)
-            mask_feed = (x_op >= min(design['x_b'], design['x_feed_intersect'])) & (x_op <= max(design['x_d'], design['x_feed_intersect']))
-            ax.plot(x_op[mask_feed], y_feed[mask_feed], 'm--', linewidth=2, label='Feed Line')
+        if feed is not None:
+            ax.plot(*feed, 'm--', linewidth=2, label='Feed Line')
         
         # Key points
         ax.plot(design['x_d'], design['x_d'], 'ro', markersize=8, label=f'Distillate ({design["x_d"]:.3f})')
@@ -292,14 +408,19 @@ def server(input, output, session):
         
         # Draw stages
         stage_data = design['stage_data']
-        for i, stage in enumerate(stage_data):
-            if i < len(stage_data) - 1:  # Don't draw last incomplete stage
-                # Vertical line (equilibrium step)
-                ax.plot([stage['x_next'], stage['x_liquid']], [stage['y_vapor'], stage['y_vapor']], 
-                       'k-', alpha=0.7, linewidth=1)
-                # Horizontal line (operating line step)
-                ax.plot([stage['x_liquid'], stage['x_liquid']], [stage['y_vapor'], stage['y_next']], 
-                       'k-', alpha=0.7, linewidth=1)
+        x_liquid, y_vapor = stage_data['x_liquid'], stage_data['y_vapor']
+        x_next, y_next = stage_data['x_next'], stage_data['y_next']
+        n = max(len(x_liquid) - 1, 0)  # Don't draw last incomplete stage
+        
+        # Two segments per stage, drawn together as a single collection
+        segments = np.empty((2 * n, 2, 2))
+        # Equilibrium step: across to the equilibrium curve at constant y
+        segments[0::2, 0] = np.column_stack((x_next[:n], y_vapor[:n]))
+        segments[0::2, 1] = np.column_stack((x_liquid[:n], y_vapor[:n]))
+        # Operating line step: down to the operating line at constant x
+        segments[1::2, 0] = np.column_stack((x_liquid[:n], y_vapor[:n]))
+        segments[1::2, 1] = np.column_stack((x_liquid[:n], y_next[:n]))
+        ax.add_collection(LineCollection(segments, colors='k', alpha=0.7, linewidths=1))
         
         ax.set_xlabel('x (liquid mole fraction acetone)', fontsize=12)
         ax.set_ylabel('y (vapor mole fraction acetone)', fontsize=12)
@@ -309,12 +430,14 @@ def server(input, output, session):
         ax.grid(True, alpha=0.3)
         ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
         
-        plt.tight_layout()
+        fig.tight_layout()
         return fig
     
     @render.text
     def design_results():
-        design = calculate_design()
+        # Only stage and reflux results are reported, so this reads the
+        # geometry and is not invalidated by feed rate changes
+        design = calculate_geometry()
         
         results = f"""DESIGN RESULTS:
 ═══════════════
@@ -371,32 +494,24 @@ Recovery:
     
     @render.table
     def stage_analysis():
-        design = calculate_design()
+        import pandas as pd
+        
+        design = calculate_geometry()
         stage_data = design['stage_data']
         
-        if not stage_data:
+        if len(stage_data['Stage']) == 0:
             return pd.DataFrame()
         
-        # Convert to DataFrame
-        df = pd.DataFrame(stage_data)
-        
-        # Round numerical values
-        numerical_cols = ['x_liquid', 'y_vapor', 'x_next', 'y_next']
-        for col in numerical_cols:
-            if col in df.columns:
-                df[col] = df[col].round(4)
-        
-        # Rename columns for better display
-        df = df.rename(columns={
-            'Stage': 'Stage #',
-            'Section': 'Section',
-            'x_liquid': 'x (liquid)',
-            'y_vapor': 'y (vapor)',
-            'x_next': 'x (next)',
-            'y_next': 'y (next)'
+        # Build the table straight from the stage columns, with display names
+        # and rounded numerical values
+        return pd.DataFrame({
+            'Stage #': stage_data['Stage'],
+            'Section': stage_data['Section'],
+            'x (liquid)': stage_data['x_liquid'].round(4),
+            'y (vapor)': stage_data['y_vapor'].round(4),
+            'x (next)': stage_data['x_next'].round(4),
+            'y (next)': stage_data['y_next'].round(4)
         })
-        
-        return df
 
 app = App(app_ui, server)
 
@@ -1,22 +1,37 @@
 from shiny import App, render, ui, reactive
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from matplotlib.patches import Rectangle
-import pandas as pd
-from scipy.optimize import fsolve
-from scipy.interpolate import interp1d
-import io
-import base64
+import functools
+import os
+import tempfile
+import zipfile
+
+# matplotlib is imported inside the functions that use it, so the app
+# starts serving before that heavy import is paid for
 
 # Define Antoine equation parameters for n-hexane and n-heptane
+# (A, B, C) in log10(P/bar) = A - B/(T/°C + C)
+HEXANE_ANTOINE = (4.00266, 1171.53, 224.216)
+HEPTANE_ANTOINE = (4.04867, 1355.126, 209.367)
+
 def psat1(temp):
     """Vapor pressure of n-hexane (bar)"""
-    return 10**(4.00266 - 1171.53/(temp + 224.216))
+    A, B, C = HEXANE_ANTOINE
+    return np.power(10.0, A - B/(np.asarray(temp) + C))
 
 def psat2(temp):
     """Vapor pressure of n-heptane (bar)"""
-    return 10**(4.04867 - 1355.126/(temp + 209.367))
+    A, B, C = HEPTANE_ANTOINE
+    return np.power(10.0, A - B/(np.asarray(temp) + C))
+
+def dpsat1_dT(temp):
+    """Temperature derivative of the n-hexane vapor pressure (bar/°C)"""
+    A, B, C = HEXANE_ANTOINE
+    return psat1(temp) * np.log(10) * B/(temp + C)**2
+
+def dpsat2_dT(temp):
+    """Temperature derivative of the n-heptane vapor pressure (bar/°C)"""
+    A, B, C = HEPTANE_ANTOINE
+    return psat2(temp) * np.log(10) * B/(temp + C)**2
 
 def px_function(x, temp):
     """Bubble point pressure"""
@@ -26,57 +41,119 @@ def py_function(x, temp):
     """Dew point pressure"""
     return 1 / (x/psat1(temp) + (1-x)/psat2(temp))
 
+def dpx_dT(x, temp):
+    """Temperature derivative of the bubble point pressure"""
+    return x * dpsat1_dT(temp) + (1 - x) * dpsat2_dT(temp)
+
+def dpy_dT(x, temp):
+    """Temperature derivative of the dew point pressure"""
+    return py_function(x, temp)**2 * (x * dpsat1_dT(temp)/psat1(temp)**2
+                                      + (1 - x) * dpsat2_dT(temp)/psat2(temp)**2)
+
+def _solve_x_at_P(P_target, temp):
+    """Liquid composition whose bubble point pressure at temp is P_target"""
+    # px_function is linear in x with d(px)/dx = psat1 - psat2, so a Newton
+    # step lands on the root from any starting point
+    p1, p2 = psat1(temp), psat2(temp)
+    return (P_target - p2) / (p1 - p2)
+
+def _solve_y_at_P(P_target, temp):
+    """Vapor composition whose dew point pressure at temp is P_target"""
+    # 1/py_function is linear in y, so the same single step applies to
+    # y/psat1 + (1-y)/psat2 = 1/P_target
+    p1, p2 = psat1(temp), psat2(temp)
+    return (1/P_target - 1/p2) / (1/p1 - 1/p2)
+
+def _batched_newton(f, fprime, x, T0, tol=1e-8, maxiter=20):
+    """
+    Solve f(x, T) = 0 for T at every composition in x at once,
+    iterating Newton's method elementwise until all residuals are below tol
+    """
+    T = np.full_like(x, T0, dtype=float)
+    residual = f(x, T)
+    iterations = 0
+    while np.any(np.abs(residual) > tol) and iterations < maxiter:
+        T = T - residual / fprime(x, T)
+        residual = f(x, T)
+        iterations += 1
+    return T
+
 def generate_equilibrium_data():
     """Generate equilibrium data for T-x-y diagram"""
     x_vals = np.linspace(0, 1, 101)
-    t_bubble = []
-    t_dew = []
-    y_vals = []
+    P = 1.0  # bar
     
-    for x in x_vals:
-        if x == 0:
-            # Pure component 2
-            t_bubble.append(98.42)  # Boiling point of n-heptane at 1 bar
-            t_dew.append(98.42)
-            y_vals.append(0)
-        elif x == 1:
-            # Pure component 1
-            t_bubble.append(68.73)  # Boiling point of n-hexane at 1 bar
-            t_dew.append(68.73)
-            y_vals.append(1)
-        else:
-            # Find bubble point temperature
-            def bubble_eq(T):
-                return px_function(x, T) - 1.0  # 1 bar
-            
-            try:
-                T_bubble = fsolve(bubble_eq, 80)[0]
-                t_bubble.append(T_bubble)
-                
-                # Calculate y from bubble point
-                y = x * psat1(T_bubble) / 1.0
-                y_vals.append(y)
-                
-                # Find dew point temperature
-                def dew_eq(T):
-                    return py_function(x, T) - 1.0  # 1 bar
-                
-                T_dew = fsolve(dew_eq, 80)[0]
-                t_dew.append(T_dew)
-                
-            except:
-                t_bubble.append(80)
-                t_dew.append(80)
-                y_vals.append(x)
+    # Bubble and dew point temperatures for every composition in one solve each
+    t_bubble = _batched_newton(lambda x, T: px_function(x, T) - P, dpx_dT, x_vals, 80)
+    t_dew = _batched_newton(lambda x, T: py_function(x, T) - P, dpy_dT, x_vals, 80)
+    
+    # Vapor composition in equilibrium with each liquid at its bubble point
+    y_vals = x_vals * psat1(t_bubble) / P
+    
+    return x_vals, t_bubble, t_dew, y_vals
+
+# Bump when generate_equilibrium_data changes so stale caches are rebuilt
+EQUILIBRIUM_CACHE_VERSION = 3
+EQUILIBRIUM_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 "equilibrium_cache.npz")
+
+@functools.cache
+def _equilibrium_data():
+    """
+    Equilibrium data for the T-x-y diagram, cached in memory and on disk.
+    The on-disk copy is only reused if it was built from the same Antoine
+    coefficients and cache version.
+    """
+    antoine = np.array((EQUILIBRIUM_CACHE_VERSION,) + HEXANE_ANTOINE + HEPTANE_ANTOINE)
+    
+    try:
+        with np.load(EQUILIBRIUM_CACHE) as cached:
+            if np.array_equal(cached['antoine'], antoine):
+                return (cached['x_eq'], cached['t_bubble'],
+                        cached['t_dew'], cached['y_eq'])
+    except (OSError, EOFError, KeyError, ValueError, zipfile.BadZipFile):
+        # Missing, stale or damaged cache files are simply rebuilt
+        pass
+    
+    x_vals, t_bubble, t_dew, y_vals = generate_equilibrium_data()
+    
+    # Write to a temporary file and move it into place, so concurrent readers
+    # never see a half-written cache
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(suffix=".npz",
+                                        dir=os.path.dirname(EQUILIBRIUM_CACHE))
+        with os.fdopen(fd, "wb") as tmp:
+            np.savez(tmp, antoine=antoine, x_eq=x_vals,
+                     t_bubble=t_bubble, t_dew=t_dew, y_eq=y_vals)
+        os.replace(tmp_path, EQUILIBRIUM_CACHE)
+    except OSError:
+        # Read-only locations (e.g. the Shiny playground) just skip the disk cache
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
     
     return x_vals, t_bubble, t_dew, y_vals
 
 # Generate equilibrium data
-x_eq, t_bubble, t_dew, y_eq = generate_equilibrium_data()
+x_eq, t_bubble, t_dew, y_eq = _equilibrium_data()
 
-# Create interpolation functions
-tx_interp = interp1d(x_eq, t_bubble, kind='linear', fill_value='extrapolate')
-ty_interp = interp1d(y_eq, t_dew, kind='linear', fill_value='extrapolate')
+# Composition grid for the P-x-y bubble and dew curves
+x_pxy = np.linspace(0, 1, 100)
+
+@functools.lru_cache(maxsize=64)
+def _bubble_dew_at_T(T_rounded):
+    """
+    Bubble and dew point pressures over x_pxy at temperature T_rounded,
+    cached so revisiting a temperature does not recompute the curves.
+    Callers should round T (e.g. to 0.01 °C) so equal temperatures share
+    an entry.
+    """
+    p_bubble = px_function(x_pxy, T_rounded)
+    p_dew = py_function(x_pxy, T_rounded)
+    # The arrays are shared between callers, so guard against mutation
+    p_bubble.setflags(write=False)
+    p_dew.setflags(write=False)
+    return p_bubble, p_dew
 
 app_ui = ui.page_fluid(
     ui.h2("Binary Mixture VLE Interactive Tool"),
@@ -151,6 +228,30 @@ app_ui = ui.page_fluid(
 
 def server(input, output, session):
     
+    # One Figure per plot output for this session, cleared and redrawn on
+    # every render instead of being reallocated
+    figures = {}
+    
+    def reusable_axes(name, figsize):
+        from matplotlib.figure import Figure
+        
+        if name not in figures:
+            fig = Figure(figsize=figsize)
+            ax = fig.subplots()
+            params = fig.subplotpars
+            initial_layout = {key: getattr(params, key) for key in
+                              ('left', 'right', 'bottom', 'top', 'wspace', 'hspace')}
+            figures[name] = (fig, ax, fig.dpi, initial_layout)
+        fig, ax, dpi, initial_layout = figures[name]
+        ax.clear()
+        # Shiny resizes the figure when rendering, and tight_layout is not
+        # idempotent once artists sit outside the axes, so always start from
+        # the same size and layout as a fresh figure
+        fig.set_size_inches(figsize)
+        fig.set_dpi(dpi)
+        fig.subplots_adjust(**initial_layout)
+        return fig, ax
+    
     @reactive.calc
     def calculate_phase_equilibrium():
         if input.diagram_type() == "pxy":
@@ -179,14 +280,10 @@ def server(input, output, session):
                 # Two-phase region
                 phase = "two-phase"
                 # Solve for liquid composition
-                def liquid_eq(x):
-                    return px_function(x, T) - P_point
-                x_liquid = fsolve(liquid_eq, z)[0]
+                x_liquid = _solve_x_at_P(P_point, T)
                 
                 # Solve for vapor composition
-                def vapor_eq(x):
-                    return py_function(x, T) - P_point
-                y_vapor = fsolve(vapor_eq, z)[0]
+                y_vapor = _solve_y_at_P(P_point, T)
                 
                 # Calculate vapor fraction using lever rule
                 vapor_fraction = (y_vapor - z) / (y_vapor - x_liquid)
@@ -209,8 +306,9 @@ def server(input, output, session):
             z = input.x_composition_txy()
             
             # For T-x-y at constant pressure, use equilibrium data
-            T_bubble_z = tx_interp(z)
-            T_dew_z = ty_interp(z) if z < 1 else tx_interp(z)
+            # (x_eq and y_eq both increase with composition)
+            T_bubble_z = np.interp(z, x_eq, t_bubble)
+            T_dew_z = np.interp(z, y_eq, t_dew) if z < 1 else np.interp(z, x_eq, t_bubble)
             
             # Determine phase and compositions
             if T_point > T_dew_z:
@@ -229,15 +327,14 @@ def server(input, output, session):
                 # Two-phase region
                 phase = "two-phase"
                 # Interpolate to find compositions
+                # t_bubble and t_dew decrease with composition, so search the
+                # reversed (increasing) tables and interpolate between the
+                # bracketing grid points
                 # Find x where T_bubble(x) = T_point
-                x_range = np.linspace(0, 1, 1000)
-                t_range = [tx_interp(x) for x in x_range]
-                x_liquid = x_range[np.argmin(np.abs(np.array(t_range) - T_point))]
+                x_liquid = np.interp(T_point, t_bubble[::-1], x_eq[::-1])
                 
                 # Find y where T_dew(y) = T_point
-                y_range = np.linspace(0, 1, 1000)
-                t_dew_range = [ty_interp(y) for y in y_range]
-                y_vapor = y_range[np.argmin(np.abs(np.array(t_dew_range) - T_point))]
+                y_vapor = np.interp(T_point, t_dew[::-1], y_eq[::-1])
                 
                 # Calculate vapor fraction using lever rule
                 if y_vapor != x_liquid:
@@ -257,20 +354,31 @@ def server(input, output, session):
                 'z': z
             }
     
+    @reactive.calc
+    def diagram_curves():
+        """
+        Bubble and dew point curves as (x_bubble, bubble, y_dew, dew).
+        These depend only on the diagram type and temperature, not on the
+        operating point.
+        """
+        if input.diagram_type() == "pxy":
+            p_bubble, p_dew = _bubble_dew_at_T(round(input.temperature(), 2))
+            return x_pxy, p_bubble, x_pxy, p_dew
+        else:
+            return x_eq, t_bubble, y_eq, t_dew
+    
     @render.plot
     def phase_diagram():
         equilibrium = calculate_phase_equilibrium()
+        x_bubble, bubble, y_dew, dew = diagram_curves()
         
-        fig, ax = plt.subplots(figsize=(8, 6))
+        fig, ax = reusable_axes('phase_diagram', figsize=(8, 6))
+        
+        ax.plot(x_bubble, bubble, 'b-', linewidth=2, label='Bubble point')
+        ax.plot(y_dew, dew, 'g-', linewidth=2, label='Dew point')
         
         if input.diagram_type() == "pxy":
             T = equilibrium['T']
-            x_range = np.linspace(0, 1, 100)
-            p_bubble = [px_function(x, T) for x in x_range]
-            p_dew = [py_function(x, T) for x in x_range]
-            
-            ax.plot(x_range, p_bubble, 'b-', linewidth=2, label='Bubble point')
-            ax.plot(x_range, p_dew, 'g-', linewidth=2, label='Dew point')
             
             # Plot operating point and tie line
             z = equilibrium['z']
@@ -299,9 +407,6 @@ def server(input, output, session):
             ax.text(0.85, 0.5, 'vapor', fontsize=14, color='gray')
             
         else:  # txy diagram
-            ax.plot(x_eq, t_bubble, 'b-', linewidth=2, label='Bubble point')
-            ax.plot(y_eq, t_dew, 'g-', linewidth=2, label='Dew point')
-            
             # Plot operating point and tie line
             z = equilibrium['z']
             T_point = equilibrium['T_point']
@@ -330,14 +435,16 @@ def server(input, output, session):
         
         ax.legend()
         ax.grid(True, alpha=0.3)
-        plt.tight_layout()
+        fig.tight_layout()
         return fig
     
     @render.plot
     def lever_rule():
+        from matplotlib.patches import Rectangle
+        
         equilibrium = calculate_phase_equilibrium()
         
-        fig, ax = plt.subplots(figsize=(3, 6))
+        fig, ax = reusable_axes('lever_rule', figsize=(3, 6))
         
         vapor_frac = equilibrium['vapor_fraction']
         liquid_frac = 1 - vapor_frac
@@ -372,7 +479,7 @@ def server(input, output, session):
             ax.axhline(y=i, color='gray', linestyle='-', alpha=0.3)
             ax.text(-0.05, i, f'{i:.1f}', ha='right', va='center')
         
-        plt.tight_layout()
+        fig.tight_layout()
         return fig
     
     @render.text